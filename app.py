@@ -1,16 +1,34 @@
 from flask import Flask, render_template, request, jsonify, send_file
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+import ahocorasick
 import nltk
+import numpy as np
 import spacy
+from spacy.attrs import LOWER, POS
+from spacy.parts_of_speech import VERB
 import re
 from datetime import datetime
 import json
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import base64
+import hashlib
 import io
+import itertools
 import os
+import secrets
+import shutil
+import string
+import threading
 from werkzeug.utils import secure_filename
 
+# orjson is optional; jsonify falls back to the stdlib json provider without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Download NLTK data if not already present
 try:
     nltk.data.find('tokenizers/punkt')
@@ -30,24 +48,93 @@ CORS(app)  # Enable CORS for all routes
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 app.config['UPLOAD_FOLDER'] = 'uploads'
 
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that serializes with orjson, keeping Flask's sorted keys and fallbacks"""
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+
 # Create upload folder if it doesn't exist
 if not os.path.exists('uploads'):
     os.makedirs('uploads')
 
-# Load spaCy model
+# Load spaCy model without the lemmatizer, whose output is never read.
+# The attribute_ruler stays enabled because it maps tags to the POS values used for verbs.
 try:
-    nlp = spacy.load("en_core_web_sm")
+    nlp = spacy.load("en_core_web_sm", disable=["lemmatizer"])
 except:
     print("Please install spacy model: python -m spacy download en_core_web_sm")
     # Create a dummy nlp object to prevent errors
     nlp = None
 
+# Rule-based sentence splitter, so segmenting a transcript does not need the dependency parser
+senter = None
+if nlp:
+    senter = spacy.blank("en")
+    senter.add_pipe("sentencizer")
+
+# Number of texts spaCy processes per batch in nlp.pipe
+SPACY_BATCH_SIZE = int(os.environ.get('IRMS_SPACY_BATCH_SIZE', 16))
+
+# Shared pool that runs spaCy work off the request threads. spaCy releases the GIL
+# in its inner loops, and the pool size caps how many parses run at once.
+nlp_pool = ThreadPoolExecutor(max_workers=int(os.environ.get('IRMS_NLP_WORKERS', 2)))
+
 # In-memory storage (replace with MongoDB in production)
 requirements_db = []
 stakeholders_db = []
 changes_log = []
 brd_templates = []
 
+# ID indexes over the lists above, kept in sync on every insert
+requirements_by_id = {}
+brd_templates_by_id = {}
+
+# Requirement IDs come from a shared counter, so concurrent requests never hand out the same one.
+# The lock guards the counter and keeps requirements_db and its index updated together.
+requirement_counter = itertools.count(1)
+requirements_lock = threading.Lock()
+
+class LRUCache:
+    """Small thread-safe LRU cache with hit/miss counters"""
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+    
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entry when full"""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+    
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data), 'maxsize': self.maxsize}
+
 class RequirementsExtractor:
     def __init__(self):
         self.requirement_patterns = [
@@ -63,77 +150,157 @@ class RequirementsExtractor:
         
         self.actor_keywords = ["user", "customer", "admin", "manager", "employee", "system", "client", "vendor"]
         self.action_verbs = ["create", "view", "update", "delete", "manage", "access", "generate", "submit", "approve", "track", "monitor", "search", "filter", "export", "import"]
+        
+        # Fuse the requirement patterns into one alternation so the text is scanned once.
+        # Each pattern's capture group is renamed to r0, r1, ... so the matching one can be found.
+        # Matches are leftmost and non-overlapping, so a phrase nested inside another match is no
+        # longer reported separately: in "we need to make sure the system should send emails" only
+        # the "we need to" requirement is found, not also "send emails".
+        self._req_re = re.compile(
+            "|".join(f"(?:{pattern.replace('(.+?)', f'(?P<r{i}>.+?)', 1)})"
+                     for i, pattern in enumerate(self.requirement_patterns)),
+            re.IGNORECASE
+        )
+        self._benefit_res = [re.compile(pattern, re.IGNORECASE)
+                             for pattern in [r"to\s+(.+)", r"so that\s+(.+)", r"in order to\s+(.+)"]]
+        self._action_re = re.compile(r"I want to (.+?) so that")
+        
+        # Keyword alternations replace per-keyword substring checks with one scan.
+        # No word boundaries, so "users" and "created" still match like the substring checks did.
+        self._verb_re = re.compile("|".join(map(re.escape, self.action_verbs)))
+        self._actor_re = re.compile("|".join(map(re.escape, self.actor_keywords)))
+        self._create_re = re.compile("create|add|submit")
+        self._update_re = re.compile("update|edit|modify")
+        self._delete_re = re.compile("delete|remove")
+        
+        # Actor keyword hashes, compared against the LOWER column of Doc.to_array
+        self._actor_hashes = np.array([nlp.vocab.strings.add(a) for a in self.actor_keywords], dtype=np.uint64) if nlp else None
+        
+        # Outputs depend only on the input text, so cached entries never need invalidating
+        self.requirements_cache = LRUCache(maxsize=256)
+        self.user_story_cache = LRUCache(maxsize=1024)
     
-    def extract_requirements(self, text):
-        """Extract potential requirements from text"""
-        text = text.lower()
+    def extract_requirements(self, text, max_requirements=None):
+        """Extract up to max_requirements potential requirements from text, returning them with the PERSON names found"""
+        key = (max_requirements, hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest())
+        cached = self.requirements_cache.get(key)
+        if cached is not None:
+            requirements, people = cached
+            return list(requirements), list(people)
+        
         requirements = []
+        seen = set()  # Skip duplicates while keeping first-seen order
+        people = []
+        failed = False
+        
+        def full():
+            return max_requirements is not None and len(requirements) >= max_requirements
         
         # Pattern matching
-        for pattern in self.requirement_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                req = match.group(1).strip()
-                if len(req) > 10:  # Filter out very short matches
-                    requirements.append(req)
+        for match in self._req_re.finditer(text):
+            if full():
+                break
+            req = match.group(match.lastgroup).strip()
+            if len(req) > 10 and req not in seen:  # Filter out very short matches
+                seen.add(req)
+                requirements.append(req)
         
         # NLP-based extraction if spaCy is available
         if nlp:
             try:
-                doc = nlp(text)
-                sentences = [sent.text.strip() for sent in doc.sents]
+                # The transcript itself only needs entities, for stakeholders, so skip tagging and parsing.
+                # The shared tok2vec only feeds the tagger and parser (ner has its own), so skip it too.
+                # Only the names are kept; holding on to the Doc would pin it in the cache.
+                doc = nlp(text, disable=["tok2vec", "tagger", "parser", "attribute_ruler"])
+                people = [ent.text for ent in doc.ents if ent.label_ == "PERSON"]
                 
-                for sent in sentences:
-                    sent_lower = sent.lower()
-                    # Check if sentence contains action verbs and potential actors
-                    if any(verb in sent_lower for verb in self.action_verbs):
-                        if any(actor in sent_lower for actor in self.actor_keywords):
-                            requirements.append(sent)
+                # Skip the sentence scan entirely when the patterns already found enough.
+                # Sentences come from the cheap sentencizer; candidates are parsed later by parse_requirements.
+                # Transcripts are line-separated speaker turns that often lack closing punctuation,
+                # so split on line breaks first and only sentencize within each line.
+                if not full():
+                    lines = [line for line in text.splitlines() if line.strip()]
+                    sentences = (sent.text.strip() for line_doc in senter.pipe(lines) for sent in line_doc.sents)
+                    for sent in sentences:
+                        sent_lower = sent.lower()
+                        # Check if sentence contains action verbs and potential actors
+                        if self._verb_re.search(sent_lower):
+                            if self._actor_re.search(sent_lower):
+                                if sent not in seen:
+                                    seen.add(sent)
+                                    requirements.append(sent)
+                                    if full():
+                                        break
             except Exception as e:
                 print(f"NLP extraction error: {e}")
+                failed = True
         
-        # Remove duplicates
-        requirements = list(set(requirements))
-        return requirements
+        # Don't let a degraded result from a failed NLP step stick in the cache
+        if not failed:
+            self.requirements_cache.put(key, (tuple(requirements), tuple(people)))
+        return requirements, people
+    
+    def parse_requirements(self, requirements):
+        """Parse requirements with spaCy in a single batch, skipping ones with a cached user story"""
+        docs = [None] * len(requirements)
+        pending = [i for i, req in enumerate(requirements) if req not in self.user_story_cache]
+        if nlp and pending:
+            try:
+                # User stories only need POS tags and the dependency parse, not entities
+                parsed = nlp.pipe([requirements[i] for i in pending], batch_size=SPACY_BATCH_SIZE, disable=["ner"])
+                for i, doc in zip(pending, parsed):
+                    docs[i] = doc
+            except Exception as e:
+                print(f"Batch parsing error: {e}")
+        return docs
     
-    def generate_user_story(self, requirement):
-        """Convert requirement to user story format"""
+    def generate_user_story(self, requirement, doc=None):
+        """Convert requirement to user story format, reusing a pre-parsed doc if given"""
+        cached = self.user_story_cache.get(requirement)
+        if cached is not None:
+            return cached
+        
         # Default values
         actor = "user"
         action = requirement
         benefit = "improve the process"
+        failed = False
         
         if nlp:
             try:
-                doc = nlp(requirement)
+                if doc is None:
+                    doc = nlp(requirement)
+                
+                # Read LOWER and POS for all tokens as one array instead of per-token Python strings
+                attrs = doc.to_array([LOWER, POS])
                 
                 # Identify actor
-                for token in doc:
-                    if token.text.lower() in self.actor_keywords:
-                        actor = token.text.lower()
-                        break
+                actor_hits = np.flatnonzero(np.isin(attrs[:, 0], self._actor_hashes))
+                if actor_hits.size:
+                    actor = doc[int(actor_hits[0])].text.lower()
                 
                 # Identify action
-                for token in doc:
-                    if token.pos_ == "VERB":
-                        # Get the verb and its dependent words
-                        verb_phrase = " ".join([t.text for t in token.subtree])
-                        if len(verb_phrase) > 5:
-                            action = verb_phrase
-                            break
+                for i in np.flatnonzero(attrs[:, 1] == VERB):
+                    # Get the verb and its dependent words
+                    verb_phrase = " ".join([t.text for t in doc[int(i)].subtree])
+                    if len(verb_phrase) > 5:
+                        action = verb_phrase
+                        break
             except Exception as e:
                 print(f"User story generation error: {e}")
+                failed = True
         
         # Identify benefit (simplified - takes the part after "to" or "so that")
-        benefit_patterns = [r"to\s+(.+)", r"so that\s+(.+)", r"in order to\s+(.+)"]
-        for pattern in benefit_patterns:
-            match = re.search(pattern, requirement, re.IGNORECASE)
+        for pattern in self._benefit_res:
+            match = pattern.search(requirement)
             if match:
                 benefit = match.group(1).strip()
                 break
         
         # Format as user story
         user_story = f"As a {actor}, I want to {action} so that I can {benefit}"
+        if not failed:
+            self.user_story_cache.put(requirement, user_story)
         return user_story
     
     def generate_acceptance_criteria(self, user_story):
@@ -141,9 +308,10 @@ class RequirementsExtractor:
         criteria = []
         
         # Extract the action from user story
-        match = re.search(r"I want to (.+?) so that", user_story)
+        match = self._action_re.search(user_story)
         if match:
             action = match.group(1)
+            action_lower = action.lower()
             
             # Generate basic criteria
             criteria.append(f"GIVEN the {action.split()[0]} feature is available")
@@ -151,15 +319,15 @@ class RequirementsExtractor:
             criteria.append(f"THEN the system should successfully {action}")
             
             # Add validation criteria
-            if any(word in action for word in ["create", "add", "submit"]):
+            if self._create_re.search(action_lower):
                 criteria.append("AND all required fields must be validated")
                 criteria.append("AND success message should be displayed")
             
-            if any(word in action for word in ["update", "edit", "modify"]):
+            if self._update_re.search(action_lower):
                 criteria.append("AND changes should be saved to the database")
                 criteria.append("AND audit trail should be updated")
             
-            if any(word in action for word in ["delete", "remove"]):
+            if self._delete_re.search(action_lower):
                 criteria.append("AND confirmation dialog should be shown")
                 criteria.append("AND related data should be handled appropriately")
         
@@ -245,8 +413,10 @@ class BRDGenerator:
 {glossary}
 """
     
-    def generate_brd(self, requirements, project_info, diagrams=None):
-        """Generate a complete BRD from requirements"""
+    def generate_brd(self, requirements, project_info, diagrams=None, now=None):
+        """Generate a complete BRD from requirements, dated `now` (defaults to the current time)"""
+        if now is None:
+            now = datetime.now()
         
         # Format requirements for BRD
         functional_reqs = []
@@ -257,14 +427,13 @@ class BRDGenerator:
             functional_reqs.append(f"FR{i:03d}: {req['original_requirement']}")
             user_stories.append(f"**US{i:03d}:** {req['user_story']}")
             
-            criteria_text = f"\n**For US{i:03d}:**\n"
-            for criterion in req['acceptance_criteria']:
-                criteria_text += f"- {criterion}\n"
-            acceptance_criteria_all.append(criteria_text)
+            parts = [f"\n**For US{i:03d}:**\n"]
+            parts.extend(f"- {criterion}\n" for criterion in req['acceptance_criteria'])
+            acceptance_criteria_all.append("".join(parts))
         
         # Generate BRD content
         brd_content = self.template.format(
-            date=datetime.now().strftime("%Y-%m-%d"),
+            date=now.strftime("%Y-%m-%d"),
             author=project_info.get('author', 'Business Analyst'),
             project_name=project_info.get('project_name', 'Project Name'),
             executive_summary=project_info.get('executive_summary', 'This document outlines the business requirements for the project.'),
@@ -287,6 +456,14 @@ class BRDGenerator:
 extractor = RequirementsExtractor()
 brd_generator = BRDGenerator()
 
+MAX_REQUIREMENTS = 5  # Limit to 5 for demo
+
+def run_nlp(transcript):
+    """Run the spaCy-heavy part of transcript analysis, meant to be submitted to nlp_pool"""
+    requirements, people = extractor.extract_requirements(transcript, max_requirements=MAX_REQUIREMENTS)
+    req_docs = extractor.parse_requirements(requirements)
+    return requirements, people, req_docs
+
 # Test route to verify server is working
 @app.route('/test')
 def test():
@@ -309,80 +486,131 @@ def analyze_transcript():
         if not transcript:
             return jsonify({'error': 'No transcript provided'}), 400
         
-        # Extract requirements
-        requirements = extractor.extract_requirements(transcript)
+        # Extract requirements and parse them on the NLP pool
+        requirements, people, req_docs = nlp_pool.submit(run_nlp, transcript).result()
         
         if not requirements:
             return jsonify({
                 'requirements': [],
                 'stakeholders': [],
-                'total_found': 0,
                 'message': 'No requirements found. Try using phrases like "we need to", "the system should", "users must be able to"'
             })
         
         # Generate user stories and acceptance criteria
         results = []
-        for i, req in enumerate(requirements[:5], 1):  # Limit to 5 for demo
-            user_story = extractor.generate_user_story(req)
+        now_iso = datetime.now().isoformat()  # One timestamp for the whole batch
+        with requirements_lock:
+            ids = [next(requirement_counter) for _ in requirements]
+        for n, req, req_doc in zip(ids, requirements, req_docs):
+            user_story = extractor.generate_user_story(req, req_doc)
             acceptance_criteria = extractor.generate_acceptance_criteria(user_story)
             
             result = {
-                'id': f'REQ-{len(requirements_db) + i:03d}',
+                'id': f'REQ-{n:03d}',
                 'original_requirement': req,
                 'user_story': user_story,
                 'acceptance_criteria': acceptance_criteria,
-                'created_date': datetime.now().isoformat(),
+                'created_date': now_iso,
                 'status': 'Draft',
                 'priority': 'Medium'
             }
             results.append(result)
         
         # Store in database
-        requirements_db.extend(results)
+        with requirements_lock:
+            requirements_db.extend(results)
+            requirements_by_id.update({r['id']: r for r in results})
         
         # Extract stakeholders
-        stakeholders = extract_stakeholders(transcript)
+        stakeholders = extract_stakeholders(people, transcript)
         
         return jsonify({
             'requirements': results,
-            'stakeholders': stakeholders,
-            'total_found': len(requirements)
+            'stakeholders': stakeholders
         })
     
     except Exception as e:
         print(f"Error in analyze_transcript: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-def extract_stakeholders(text):
-    """Extract potential stakeholders from text"""
-    stakeholders = set()
+# Role mentions used by extract_stakeholders, as one Aho-Corasick automaton so the text is scanned
+# once for all of them. Roles in PREFIXED_ROLES also take the word before them, like a (\w+\s+)?
+# regex prefix would.
+ROLE_WORDS = ["manager", "director", "lead", "team", "product owner", "business analyst", "developer", "tester"]
+PREFIXED_ROLES = {"manager", "director", "lead", "team"}
+
+role_automaton = ahocorasick.Automaton()
+for role in ROLE_WORDS:
+    role_automaton.add_word(role, role)
+role_automaton.make_automaton()
+
+# Case folding for the automaton scan. Every character maps to exactly one character, so offsets
+# into the folded text are valid in the original, and exactly the characters re.IGNORECASE treats
+# as equal to an ASCII letter are folded (including the dotted/dotless I, long s and Kelvin sign).
+ROLE_FOLD = str.maketrans({**{c: c.lower() for c in string.ascii_uppercase},
+                           '\u0130': 'i', '\u0131': 'i', '\u017f': 's', '\u212a': 'k'})
+
+def is_word_char(c):
+    """Match the regex \\w class for a single character"""
+    return c.isalnum() or c == '_'
+
+def prefix_start(text, start, floor=0):
+    """Return where the "word + whitespace" prefix ending at start begins, or start if there is none.
     
-    if nlp:
-        try:
-            doc = nlp(text)
-            # Look for person names
-            for ent in doc.ents:
-                if ent.label_ == "PERSON":
-                    stakeholders.add(ent.text)
-        except Exception as e:
-            print(f"Stakeholder extraction error: {e}")
+    The prefix cannot reach back past floor, where the previous match of the same role ended.
+    """
+    i = start
+    while i > floor and text[i - 1].isspace():
+        i -= 1
+    j = i
+    while j > floor and is_word_char(text[j - 1]):
+        j -= 1
+    # Only a word followed by whitespace counts as a prefix
+    return j if j < i < start else start
+
+def find_role_mentions(text):
+    """Return role mentions in text, scanning it once.
     
-    # Look for role mentions
-    role_patterns = [
-        r"(\w+\s+)?manager",
-        r"(\w+\s+)?director",
-        r"(\w+\s+)?lead",
-        r"(\w+\s+)?team",
-        r"product owner",
-        r"business analyst",
-        r"developer",
-        r"tester"
-    ]
+    The mentions are exactly what finditer over each role's regex found: non-overlapping per role,
+    with the preceding word taken for roles in PREFIXED_ROLES, even when that word is the same role.
+    """
+    folded = text.translate(ROLE_FOLD)
+    mentions = []
+    match_end = dict.fromkeys(ROLE_WORDS, 0)  # Where each role's previous match ended
+    for last, role in role_automaton.iter(folded):
+        end = last + 1
+        start = end - len(role)
+        floor = match_end[role]
+        if start < floor:
+            continue  # Inside this role's previous match
+        if role in PREFIXED_ROLES:
+            prefixed = prefix_start(folded, start, floor)
+            if prefixed == start:
+                # With no prefix of its own, this mention may itself be the prefix of the next one,
+                # as in "manager  manager", which the regex matches as a single mention
+                word_end = end
+                while word_end < len(folded) and is_word_char(folded[word_end]):
+                    word_end += 1
+                next_start = word_end
+                while next_start < len(folded) and folded[next_start].isspace():
+                    next_start += 1
+                if next_start > word_end and folded.startswith(role, next_start):
+                    while prefixed > floor and is_word_char(folded[prefixed - 1]):
+                        prefixed -= 1
+                    end = next_start + len(role)
+            start = prefixed
+        match_end[role] = end
+        mentions.append(text[start:end])
+    return mentions
+
+def extract_stakeholders(people, text):
+    """Extract potential stakeholders from the PERSON names already found in text and its role mentions"""
+    # Dict keys act as an ordered set so stakeholders come back in first-seen order
+    stakeholders = dict.fromkeys(people)
     
-    for pattern in role_patterns:
-        matches = re.finditer(pattern, text, re.IGNORECASE)
-        for match in matches:
-            stakeholders.add(match.group(0).strip().title())
+    # Look for role mentions
+    for mention in find_role_mentions(text):
+        stakeholders[mention.strip().title()] = None
     
     return list(stakeholders)
 
@@ -399,11 +627,14 @@ def upload_image():
             return jsonify({'error': 'No image selected'}), 400
         
         if file:
-            filename = secure_filename(file.filename)
+            # Random suffix keeps concurrent uploads of the same name within a second apart
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"{timestamp}_{filename}"
+            filename = f"{timestamp}_{secrets.token_hex(4)}_{secure_filename(file.filename)}"
             filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
+            
+            # Stream to disk in 64KB chunks so peak memory stays bounded
+            with open(filepath, 'wb', buffering=1 << 20) as dst:
+                shutil.copyfileobj(file.stream, dst, length=1 << 16)
             
             return jsonify({
                 'success': True,
@@ -421,33 +652,41 @@ def generate_brd():
         requirement_ids = data.get('requirement_ids', [])
         project_info = data.get('project_info', {})
         include_diagrams = data.get('include_diagrams', False)
+        persist = data.get('persist', True)  # False skips the copy in uploads/, e.g. for previews
         
         # Get selected requirements
-        selected_requirements = [req for req in requirements_db if req['id'] in requirement_ids]
+        wanted_ids = set(requirement_ids)
+        selected_requirements = [req for req in requirements_db if req['id'] in wanted_ids]
         
         if not selected_requirements:
             return jsonify({'error': 'No requirements selected'}), 400
         
-        # Generate BRD
-        brd_content = brd_generator.generate_brd(selected_requirements, project_info, include_diagrams)
+        # Generate BRD, sharing one timestamp between its date, ID and record
+        now = datetime.now()
+        brd_content = brd_generator.generate_brd(selected_requirements, project_info, include_diagrams, now=now)
         
-        # Save BRD
-        brd_id = f"BRD-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        # Save BRD; the random suffix keeps BRDs generated within the same second apart
+        brd_id = f"BRD-{now.strftime('%Y%m%d%H%M%S')}-{secrets.token_hex(3)}"
         brd_filename = f"{brd_id}.md"
-        brd_path = os.path.join('uploads', brd_filename)
         
-        with open(brd_path, 'w') as f:
-            f.write(brd_content)
+        if persist:
+            brd_path = os.path.join('uploads', brd_filename)
+            with open(brd_path, 'w', buffering=65536) as f:
+                f.write(brd_content)
         
         # Store BRD reference
+        content_bytes = brd_content.encode('utf-8')
         brd_record = {
             'id': brd_id,
             'filename': brd_filename,
-            'created_date': datetime.now().isoformat(),
+            'created_date': now.isoformat(),
             'requirements': requirement_ids,
-            'project_info': project_info
+            'project_info': project_info,
+            'content_bytes': content_bytes,  # Served by download_brd without touching disk
+            'etag': hashlib.sha1(content_bytes).hexdigest()
         }
         brd_templates.append(brd_record)
+        brd_templates_by_id[brd_id] = brd_record
         
         return jsonify({
             'success': True,
@@ -462,12 +701,20 @@ def generate_brd():
 def download_brd(brd_id):
     """Download BRD as markdown file"""
     try:
-        brd = next((b for b in brd_templates if b['id'] == brd_id), None)
+        brd = brd_templates_by_id.get(brd_id)
         if not brd:
             return jsonify({'error': 'BRD not found'}), 404
         
-        filepath = os.path.join('uploads', brd['filename'])
-        return send_file(filepath, as_attachment=True, download_name=f"{brd_id}_BRD.md")
+        # The ETag is a hash of the content, so a 304 or Range response always matches what is served
+        return send_file(
+            io.BytesIO(brd['content_bytes']),
+            mimetype='text/markdown',
+            as_attachment=True,
+            download_name=f"{brd_id}_BRD.md",
+            etag=brd['etag'],
+            last_modified=datetime.fromisoformat(brd['created_date']).timestamp(),
+            conditional=True
+        )
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -482,31 +729,31 @@ def update_requirement():
         req_id = data.get('id')
         
         # Find requirement
-        for req in requirements_db:
-            if req['id'] == req_id:
-                # Log change
-                change = {
-                    'requirement_id': req_id,
-                    'timestamp': datetime.now().isoformat(),
-                    'changes': []
-                }
-                
-                # Update fields and track changes
-                for field in ['user_story', 'status', 'priority']:
-                    if field in data and data[field] != req[field]:
-                        change['changes'].append({
-                            'field': field,
-                            'old_value': req[field],
-                            'new_value': data[field]
-                        })
-                        req[field] = data[field]
-                
-                if change['changes']:
-                    changes_log.append(change)
-                
-                return jsonify({'success': True, 'requirement': req})
+        req = requirements_by_id.get(req_id)
+        if not req:
+            return jsonify({'error': 'Requirement not found'}), 404
+        
+        # Log change
+        change = {
+            'requirement_id': req_id,
+            'timestamp': datetime.now().isoformat(),
+            'changes': []
+        }
         
-        return jsonify({'error': 'Requirement not found'}), 404
+        # Update fields and track changes
+        for field in ['user_story', 'status', 'priority']:
+            if field in data and data[field] != req[field]:
+                change['changes'].append({
+                    'field': field,
+                    'old_value': req[field],
+                    'new_value': data[field]
+                })
+                req[field] = data[field]
+        
+        if change['changes']:
+            changes_log.append(change)
+        
+        return jsonify({'success': True, 'requirement': req})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -518,15 +765,13 @@ def generate_communication():
         stakeholder_type = data.get('stakeholder_type', 'general')
         
         # Find requirement
-        requirement = None
-        for req in requirements_db:
-            if req['id'] == req_id:
-                requirement = req
-                break
+        requirement = requirements_by_id.get(req_id)
         
         if not requirement:
             return jsonify({'error': 'Requirement not found'}), 404
         
+        criteria_list = "\n".join(f"- {criteria}" for criteria in requirement['acceptance_criteria'])
+        
         # Generate communication template based on stakeholder type
         templates = {
             'executive': f"""
@@ -559,7 +804,7 @@ ID: {requirement['id']}
 User Story: {requirement['user_story']}
 
 Acceptance Criteria:
-{chr(10).join(['- ' + criteria for criteria in requirement['acceptance_criteria']])}
+{criteria_list}
 
 Technical Considerations:
 - API changes may be required
@@ -596,6 +841,14 @@ Best,
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    """Report hit/miss counts for the NLP result caches"""
+    return jsonify({
+        'requirements': extractor.requirements_cache.stats(),
+        'user_stories': extractor.user_story_cache.stats()
+    })
+
 @app.route('/get_change_history', methods=['GET'])
 def get_change_history():
     try:
@@ -614,5 +867,6 @@ if __name__ == '__main__':
     print("Make sure you have installed: pip install flask flask-cors nltk spacy")
     print("And downloaded: python -m spacy download en_core_web_sm")
     print("Server will be available at: http://localhost:5000")
+    print("This is the development server; for production run: gunicorn --workers 1 --threads 8 wsgi:app")
     port = int(os.environ.get('PORT', 5000))
     app.run(debug=False, host='0.0.0.0', port=port)
@@ -0,0 +1,8 @@
+"""WSGI entry point for production servers.
+
+Requirements, BRDs and change history are kept in process memory, so run a single
+worker and scale with threads; separate worker processes would not share that state:
+
+    gunicorn --workers 1 --threads 8 --bind 0.0.0.0:$PORT wsgi:app
+"""
+from app import app